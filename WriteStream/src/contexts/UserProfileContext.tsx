@@ -133,8 +133,10 @@ export function UserProfileProvider({ children }: { children: ReactNode }) {
     if (!account) return false;
 
     try {
-      const favorites = await getUserFavorites();
-      return favorites.some(fav => fav.article_id === articleId);
+      const response = await fetch(`${API_BASE_URL}/users/${account}/favorites/${articleId}`);
+      if (!response.ok) return false;
+      const data = await response.json();
+      return Boolean(data.is_favorited);
     } catch (error) {
       console.error('Failed to check if favorited:', error);
       return false;
@@ -251,12 +253,28 @@ export function UserProfileProvider({ children }: { children: ReactNode }) {
     }
   };
 
+  // List endpoints return one page at a time; follow X-Next-Cursor until the last page
+  const fetchAllPages = async (url: string) => {
+    const items: any[] = [];
+    let cursor: string | null = null;
+
+    do {
+      const params = new URLSearchParams({ limit: '500' });
+      if (cursor) params.set('cursor', cursor);
+      const response = await fetch(`${url}?${params}`);
+      if (!response.ok) throw new Error(`Request failed with status ${response.status}`);
+      items.push(...(await response.json()));
+      cursor = response.headers.get('X-Next-Cursor');
+    } while (cursor);
+
+    return items;
+  };
+
   const getUserFavorites = async () => {
     if (!account) return [];
 
     try {
-      const response = await fetch(`${API_BASE_URL}/users/${account}/favorites`);
-      return await response.json();
+      return await fetchAllPages(`${API_BASE_URL}/users/${account}/favorites`);
     } catch (error) {
       console.error('Failed to get user favorites:', error);
       return [];
@@ -267,8 +285,7 @@ export function UserProfileProvider({ children }: { children: ReactNode }) {
     if (!account) return [];
 
     try {
-      const response = await fetch(`${API_BASE_URL}/users/${account}/articles`);
-      return await response.json();
+      return await fetchAllPages(`${API_BASE_URL}/users/${account}/articles`);
     } catch (error) {
       console.error('Failed to get user articles:', error);
       return [];
@@ -1,21 +1,46 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-import requests
+from fastapi.responses import JSONResponse
+import asyncio
+from collections import defaultdict
+import hashlib
 import os
 from dotenv import load_dotenv
-from pymongo import MongoClient
-from pymongo.errors import DuplicateKeyError
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import IndexModel, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure, PyMongoError
 import json
+import orjson
 from datetime import datetime
 from pydantic import BaseModel
 from typing import Optional, List
 from bson import ObjectId
+from bson.errors import InvalidId
 import ssl
 import certifi
+from cachetools import TTLCache
+from upload_worker import PINATA_API_KEY, UploadSizeLimitMiddleware, create_pinata_client, router as upload_router
 
 load_dotenv()
 
-app = FastAPI()
+def orjson_default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+# JSON responses rendered with orjson, which also handles datetimes and ObjectIds natively
+class ORJSONResponse(JSONResponse):
+    def render(self, content):
+        return orjson.dumps(content, default=orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+app = FastAPI(default_response_class=ORJSONResponse)
+
+# Uploads can be split off to the upload_worker service; set SERVE_UPLOADS=false to drop them from this API
+SERVE_UPLOADS = os.getenv("SERVE_UPLOADS", "true").lower() != "false"
+
+if SERVE_UPLOADS:
+    app.add_middleware(UploadSizeLimitMiddleware)
+    app.include_router(upload_router)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,20 +48,89 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
-PINATA_API_KEY = os.getenv("PINATA_API_KEY")
-PINATA_SECRET_API_KEY = os.getenv("PINATA_SECRET_API_KEY")
-
 # MongoDB connection with proper SSL handling
 MONGODB_URL = os.getenv("MONGODB_URL")
 
+# A user's view of an article is counted at most once per this window. Older view records
+# expire so article_views stays small; total_views in article_analytics is unaffected.
+VIEW_DEDUP_TTL_SECONDS = 86400 * 30
+
+# Indexes created at startup, grouped by collection
+MONGO_INDEXES = {
+    "users": [
+        IndexModel("wallet_address", unique=True)
+    ],
+    "article_views": [
+        IndexModel([("article_id", 1), ("user_wallet", 1)], unique=True),
+        IndexModel("viewed_at", expireAfterSeconds=VIEW_DEDUP_TTL_SECONDS)
+    ],
+    "article_reactions": [
+        IndexModel([("article_id", 1), ("user_wallet", 1)], unique=True)
+    ],
+    "article_analytics": [
+        IndexModel("article_id", unique=True)
+    ],
+    "user_favorites": [
+        IndexModel([("user_wallet", 1), ("article_id", 1)], unique=True),
+        # Serves per-user listings in sort order without an in-memory sort
+        IndexModel([("user_wallet", 1), ("added_at", -1), ("_id", -1)]),
+        # Text index for search
+        IndexModel([("article_title", "text")])
+    ],
+    "user_articles": [
+        IndexModel([("user_wallet", 1), ("created_at", -1), ("_id", -1)])
+    ]
+}
+
+# Client options shared by every connection strategy. minPoolSize keeps warm connections
+# ready so the first requests after startup don't pay the TLS + auth handshake, and the
+# driver's background monitor (heartbeatFrequencyMS) keeps the topology fresh instead of
+# pinging per request. maxPoolSize caps connections per worker to avoid Atlas connection
+# storms, and waitQueueTimeoutMS fails a request fast with a 503 (via run_mongo) when the
+# pool is exhausted. Wire compression cuts bytes on the wire for the text-heavy list responses.
+MONGO_CLIENT_OPTIONS = {
+    "maxPoolSize": 50,
+    "minPoolSize": 10,
+    "waitQueueTimeoutMS": 2000,
+    "serverSelectionTimeoutMS": 2000,
+    "heartbeatFrequencyMS": 10000,
+    "connectTimeoutMS": 5000,
+    "socketTimeoutMS": 10000,
+    "retryWrites": True,
+    # Negotiated with the server; zlib is the fallback when the zstd/snappy extras are missing
+    "compressors": "zstd,snappy,zlib",
+    "zlibCompressionLevel": 6
+}
+
 # Global variables for MongoDB
 client = None
 db = None
+reconnect_task = None
+
+# Collection handles, bound once per connected client instead of per request
+users_collection = None
+views_collection = None
+reactions_collection = None
+analytics_collection = None
+favorites_collection = None
+articles_collection = None
+
+def bind_collections(database):
+    global users_collection, views_collection, reactions_collection
+    global analytics_collection, favorites_collection, articles_collection
+    
+    users_collection = database.users
+    views_collection = database.article_views
+    reactions_collection = database.article_reactions
+    analytics_collection = database.article_analytics
+    favorites_collection = database.user_favorites
+    articles_collection = database.user_articles
 
 # Enhanced connection strategies for production
-def create_mongo_client():
+async def create_mongo_client():
     global client, db
     
     if not MONGODB_URL:
@@ -44,72 +138,71 @@ def create_mongo_client():
     
     strategies = [
         # Strategy 1: Production-ready connection with certificates
-        lambda: MongoClient(
+        lambda: AsyncIOMotorClient(
             MONGODB_URL,
             tlsCAFile=certifi.where(),
-            serverSelectionTimeoutMS=30000,
-            connectTimeoutMS=30000,
-            socketTimeoutMS=30000,
-            retryWrites=True,
-            w='majority'
+            w='majority',
+            **MONGO_CLIENT_OPTIONS
         ),
         
         # Strategy 2: Allow invalid certificates (for development/testing)
-        lambda: MongoClient(
+        lambda: AsyncIOMotorClient(
             MONGODB_URL,
             tls=True,
             tlsAllowInvalidCertificates=True,
             tlsInsecure=True,
-            serverSelectionTimeoutMS=30000,
-            connectTimeoutMS=30000,
-            socketTimeoutMS=30000,
-            retryWrites=True,
-            w='majority'
+            w='majority',
+            **MONGO_CLIENT_OPTIONS
         ),
         
         # Strategy 3: Basic connection with SSL disabled verification
-        lambda: MongoClient(
+        lambda: AsyncIOMotorClient(
             MONGODB_URL,
             ssl=True,
             ssl_cert_reqs=ssl.CERT_NONE,
-            serverSelectionTimeoutMS=30000,
-            connectTimeoutMS=30000,
-            socketTimeoutMS=30000,
-            retryWrites=True,
-            w='majority'
+            w='majority',
+            **MONGO_CLIENT_OPTIONS
         ),
         
         # Strategy 4: Minimal connection for debugging
-        lambda: MongoClient(MONGODB_URL)
+        lambda: AsyncIOMotorClient(MONGODB_URL, **MONGO_CLIENT_OPTIONS)
     ]
     
     for i, strategy in enumerate(strategies, 1):
         try:
+            test_client = None
             print(f"Trying MongoDB connection strategy {i}...")
             test_client = strategy()
             # Test the connection with a longer timeout
-            test_client.admin.command('ping')
+            await test_client.admin.command('ping')
             print(f"MongoDB connected successfully with strategy {i}!")
             
-            # Set global variables
+            # Set global variables, closing any client this one replaces so its pool and monitors stop
+            previous_client = client
             client = test_client
             db = client.writestream
+            bind_collections(db)
+            if previous_client is not None:
+                previous_client.close()
             return test_client
         except Exception as e:
             print(f"Strategy {i} failed: {e}")
+            # Close the failed client so its pool stops trying to keep minPoolSize connections open
+            if test_client is not None:
+                test_client.close()
             continue
     
     raise Exception("All MongoDB connection strategies failed")
 
 # Initialize MongoDB connection with retry logic
-def initialize_mongodb():
+async def initialize_mongodb():
     global client, db
     max_retries = 3
     
     for attempt in range(max_retries):
         try:
             print(f"MongoDB connection attempt {attempt + 1}/{max_retries}")
-            create_mongo_client()
+            await create_mongo_client()
             print("MongoDB initialization successful!")
             return True
         except Exception as e:
@@ -117,35 +210,33 @@ def initialize_mongodb():
             if attempt == max_retries - 1:
                 print("All MongoDB connection attempts failed. Server will continue without database.")
                 return False
-            import time
-            time.sleep(5)  # Wait 5 seconds before retry
+            await asyncio.sleep(5)  # Wait 5 seconds before retry
     
     return False
 
-def get_db():
-    global client, db
+async def get_db():
+    global reconnect_task
     
-    try:
-        if client is None or db is None:
+    if client is None or db is None:
+        # Reconnect in the background rather than stalling this request on connection retries
+        if reconnect_task is None or reconnect_task.done():
             print("MongoDB client not initialized, attempting to reconnect...")
-            if not initialize_mongodb():
-                raise HTTPException(status_code=500, detail="Database connection failed: MongoDB client not initialized")
-        
-        # Test connection
-        client.admin.command('ping')
-        return db
-    except Exception as e:
+            reconnect_task = asyncio.create_task(initialize_mongodb())
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    
+    return db
+
+# Run a MongoDB operation once the client is available. Lost connections are not retried
+# here: the driver's monitor recovers the pool, and retryWrites already retries writes safely.
+# ConnectionFailure (AutoReconnect, ServerSelectionTimeoutError, and WaitQueueTimeoutError
+# from an exhausted pool) fails the request fast with a 503.
+async def run_mongo(operation):
+    await get_db()
+    try:
+        return await operation()
+    except ConnectionFailure as e:
         print(f"Database connection error: {e}")
-        # Try to reconnect
-        try:
-            initialize_mongodb()
-            if client and db:
-                client.admin.command('ping')
-                return db
-        except:
-            pass
-        
-        raise HTTPException(status_code=500, detail=f"Database connection failed: {str(e)}")
+        raise HTTPException(status_code=503, detail="Database unavailable")
 
 # Health check endpoint
 @app.get("/")
@@ -155,7 +246,7 @@ async def root():
 @app.get("/health")
 async def health_check():
     try:
-        db = get_db()
+        await run_mongo(lambda: db.command("ping"))
         return {"status": "healthy", "database": "connected"}
     except:
         return {"status": "unhealthy", "database": "disconnected"}
@@ -178,363 +269,467 @@ class FavoriteArticle(BaseModel):
     article_id: int
     article_title: str
 
+# Short-lived in-process caches for shared, read-mostly data. Writes handled by this process drop
+# the affected entries; the TTL bounds how stale another worker's copy can get. Per-user state
+# (profiles, a user's own reaction) is always read from MongoDB, since each worker holds its own
+# copy and a stale one would misreport a change the user just made.
+search_cache = TTLCache(maxsize=1024, ttl=30)
+analytics_cache = TTLCache(maxsize=4096, ttl=15)
+
 # Search endpoint
 @app.get("/api/articles/search")
-async def search_articles(query: str = Query(..., min_length=1)):
+async def search_articles(query: str = Query(..., min_length=3)):
     try:
-        db = get_db()
-        favorites_collection = db.user_favorites
-        
-        # Search in article titles
-        search_results = list(favorites_collection.find({
-            "article_title": {"$regex": query, "$options": "i"}
-        }).limit(50))
-        
-        for result in search_results:
-            result["_id"] = str(result["_id"])
-        
-        return search_results
-    except Exception as e:
+        # Text search ignores case and extra whitespace, so normalize before hitting the cache
+        normalized_query = " ".join(query.lower().split())
+        cached = search_cache.get(normalized_query)
+        if cached is not None:
+            return ORJSONResponse(cached)
+        
+        # Search in article titles using the text index, one row per article, best matches first
+        pipeline = [
+            {"$match": {"$text": {"$search": normalized_query}}},
+            {"$addFields": {"score": {"$meta": "textScore"}}},
+            {"$group": {
+                "_id": "$article_id",
+                "article_title": {"$first": "$article_title"},
+                "score": {"$max": "$score"}
+            }},
+            {"$sort": {"score": -1}},
+            {"$limit": 50},
+            {"$project": {"_id": 0, "article_id": "$_id", "article_title": 1, "score": 1}}
+        ]
+        search_results = await run_mongo(lambda: favorites_collection.aggregate(pipeline).to_list(None))
+        
+        search_cache[normalized_query] = search_results
+        return ORJSONResponse(search_results)
+    except PyMongoError as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-# Existing upload endpoint
-@app.post("/upload/")
-async def upload_file(file: UploadFile = File(...)):
-    url = "https://api.pinata.cloud/pinning/pinFileToIPFS"
-    headers = {
-        "pinata_api_key": PINATA_API_KEY,
-        "pinata_secret_api_key": PINATA_SECRET_API_KEY,
-    }
+# Conditional GET support for read-mostly endpoints
+ANALYTICS_CACHE_CONTROL = "public, max-age=15"
+USER_REACTION_CACHE_CONTROL = "private, no-cache"
+PROFILE_CACHE_CONTROL = "private, no-cache"
 
-    files = {
-        "file": (file.filename, await file.read())
-    }
+def make_etag(*parts):
+    digest = hashlib.md5(":".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest}"'
 
-    response = requests.post(url, headers=headers, files=files)
-    return response.json()
+# Return a 304 when the client's cached copy is current, otherwise stamp the validators on the response
+def check_etag(request: Request, response: Response, etag: str, cache_control: str):
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip().replace("W/", "", 1) for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
 
 # User Profile endpoints
 @app.post("/api/users/profile")
 async def create_or_update_profile(profile: UserProfile):
     try:
-        db = get_db()
-        users_collection = db.users
-        
-        profile_data = {
-            "wallet_address": profile.wallet_address,
-            "username": profile.username,
-            "email": profile.email,
-            "bio": profile.bio,
-            "avatar_url": profile.avatar_url,
-            "updated_at": datetime.utcnow()
-        }
+        now = datetime.utcnow()
+        profile_data = profile.model_dump()
+        profile_data["updated_at"] = now
         
-        result = users_collection.update_one(
+        # Upsert and return the updated document in one round-trip
+        updated_user = await run_mongo(lambda: users_collection.find_one_and_update(
             {"wallet_address": profile.wallet_address},
-            {"$set": profile_data, "$setOnInsert": {"created_at": datetime.utcnow()}},
-            upsert=True
-        )
-        
-        # Return the updated document
-        updated_user = users_collection.find_one({"wallet_address": profile.wallet_address})
-        updated_user["_id"] = str(updated_user["_id"])
+            {"$set": profile_data, "$setOnInsert": {"created_at": now}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+            projection={"_id": 0}
+        ))
         return updated_user
         
-    except Exception as e:
+    except PyMongoError as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/users/profile/{wallet_address}")
-async def get_user_profile(wallet_address: str):
+async def get_user_profile(wallet_address: str, request: Request, response: Response):
     try:
-        db = get_db()
-        users_collection = db.users
-        
-        user = users_collection.find_one({"wallet_address": wallet_address})
-        if user:
-            user["_id"] = str(user["_id"])
-            return user
-        else:
+        user = await run_mongo(lambda: users_collection.find_one({"wallet_address": wallet_address}, {"_id": 0}))
+        if not user:
             # Return default profile
-            return {
+            user = {
                 "wallet_address": wallet_address,
                 "username": None,
                 "email": None,
                 "bio": None,
                 "avatar_url": None,
             }
-    except Exception as e:
+        
+        # Every profile save bumps updated_at; the default profile has none
+        etag = make_etag(wallet_address, user.get("updated_at"))
+        not_modified = check_etag(request, response, etag, PROFILE_CACHE_CONTROL)
+        if not_modified:
+            return not_modified
+        
+        return user
+    except PyMongoError as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Work out how moving from one reaction to another changes the like/dislike totals
+def reaction_delta(previous_type: Optional[str], new_type: Optional[str]):
+    return {
+        "total_likes": (new_type == "like") - (previous_type == "like"),
+        "total_dislikes": (new_type == "dislike") - (previous_type == "dislike")
+    }
+
+# Apply a reaction delta to the article's analytics and return the new totals
+async def apply_reaction_delta(article_id: int, delta: dict, now: datetime):
+    # Repeating the same reaction (or removing none) changes nothing, so read instead of writing
+    totals_projection = {"_id": 0, "total_likes": 1, "total_dislikes": 1}
+    if not any(delta.values()):
+        analytics = await run_mongo(lambda: analytics_collection.find_one(
+            {"article_id": article_id},
+            totals_projection
+        )) or {}
+    else:
+        analytics = await run_mongo(lambda: analytics_collection.find_one_and_update(
+            {"article_id": article_id},
+            {"$inc": delta, "$set": {"updated_at": now}},
+            projection=totals_projection,
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        ))
+    return analytics.get("total_likes", 0), analytics.get("total_dislikes", 0)
+
+# Fields returned by the analytics endpoint; updated_at is kept for the ETag
+ANALYTICS_PROJECTION = {
+    "_id": 0,
+    "article_id": 1,
+    "total_views": 1,
+    "total_likes": 1,
+    "total_dislikes": 1,
+    "updated_at": 1
+}
+
+# New views are counted in memory and flushed as one bulk_write, so a burst of views on a
+# popular article becomes a single $inc per interval instead of one write per view
+VIEW_FLUSH_INTERVAL = 0.2
+pending_views = defaultdict(int)
+view_flush_task = None
+view_flush_stop = None
+
+async def flush_pending_views():
+    global pending_views
+    if not pending_views:
+        return
+    
+    # Swap the buffer out before awaiting so views recorded during the write land in the next batch
+    batch, pending_views = list(pending_views.items()), defaultdict(int)
+    now = datetime.utcnow()
+    try:
+        await run_mongo(lambda: analytics_collection.bulk_write([
+            UpdateOne(
+                {"article_id": article_id},
+                {"$inc": {"total_views": count}, "$set": {"updated_at": now}},
+                upsert=True
+            )
+            for article_id, count in batch
+        ], ordered=False))
+        failed = []
+    except BulkWriteError as e:
+        failed = [batch[error["index"]] for error in e.details["writeErrors"]]
+        print(f"Failed to flush {len(failed)} view counts: {e}")
+    except Exception as e:
+        failed = batch
+        print(f"Failed to flush view counts: {e}")
+    
+    # Requeue anything that wasn't written so the next flush retries it
+    for article_id, count in failed:
+        pending_views[article_id] += count
+    for article_id, _ in batch:
+        analytics_cache.pop(article_id, None)
+
+# Flush every interval until stopped, then once more. Shutdown signals the stop event rather
+# than cancelling, so an in-flight bulk_write always completes or requeues its batch.
+async def flush_views_periodically():
+    while not view_flush_stop.is_set():
+        try:
+            await asyncio.wait_for(view_flush_stop.wait(), timeout=VIEW_FLUSH_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        try:
+            await flush_pending_views()
+        except Exception as e:
+            # Keep the loop alive so buffered views are retried instead of piling up
+            print(f"Error flushing view counts: {e}")
+    
+    # The stop may arrive mid-write; flush views recorded (or requeued) during that write too
+    try:
+        await flush_pending_views()
+    except Exception as e:
+        print(f"Error flushing view counts: {e}")
+
 # Article Analytics endpoints
-@app.post("/api/articles/{article_id}/view")
+@app.post("/api/articles/{article_id}/view", status_code=204, response_class=Response)
 async def record_article_view(article_id: int, user_wallet: str = Query(...)):
     try:
-        db = get_db()
-        views_collection = db.article_views
-        analytics_collection = db.article_analytics
-        
+        now = datetime.utcnow()
         # Record view if not already viewed by this user
         view_data = {
             "article_id": article_id,
             "user_wallet": user_wallet,
-            "viewed_at": datetime.utcnow()
+            "viewed_at": now
         }
         
-        try:
-            views_collection.insert_one(view_data)
-            # Update analytics - increment view count
-            analytics_collection.update_one(
-                {"article_id": article_id},
-                {"$inc": {"total_views": 1}, "$set": {"updated_at": datetime.utcnow()}},
-                upsert=True
-            )
-        except DuplicateKeyError:
-            # User already viewed this article
-            pass
+        result = await run_mongo(lambda: views_collection.update_one(
+            {"article_id": article_id, "user_wallet": user_wallet},
+            {"$setOnInsert": view_data},
+            upsert=True
+        ))
         
-        return {"success": True}
-    except Exception as e:
+        # Only a first view by this user increments the view count
+        if result.upserted_id is not None:
+            pending_views[article_id] += 1
+        
+        return Response(status_code=204)
+    except PyMongoError as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/articles/react")
 async def react_to_article(reaction: ArticleReaction):
     try:
-        db = get_db()
-        reactions_collection = db.article_reactions
-        analytics_collection = db.article_analytics
-        
+        now = datetime.utcnow()
         # Insert or update reaction
-        reaction_data = {
-            "article_id": reaction.article_id,
-            "user_wallet": reaction.user_wallet,
-            "reaction_type": reaction.reaction_type,
-            "created_at": datetime.utcnow()
-        }
+        reaction_data = reaction.model_dump()
+        reaction_data["created_at"] = now
         
-        reactions_collection.update_one(
+        previous = await run_mongo(lambda: reactions_collection.find_one_and_update(
             {"article_id": reaction.article_id, "user_wallet": reaction.user_wallet},
             {"$set": reaction_data},
-            upsert=True
-        )
-        
-        # Calculate new counts
-        likes_count = reactions_collection.count_documents({
-            "article_id": reaction.article_id,
-            "reaction_type": "like"
-        })
-        
-        dislikes_count = reactions_collection.count_documents({
-            "article_id": reaction.article_id,
-            "reaction_type": "dislike"
-        })
-        
-        # Update analytics
-        analytics_collection.update_one(
-            {"article_id": reaction.article_id},
-            {
-                "$set": {
-                    "total_likes": likes_count,
-                    "total_dislikes": dislikes_count,
-                    "updated_at": datetime.utcnow()
-                }
-            },
-            upsert=True
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        ))
+        previous_type = previous["reaction_type"] if previous else None
+        
+        # Update analytics by the change in reaction instead of recounting
+        likes_count, dislikes_count = await apply_reaction_delta(
+            reaction.article_id,
+            reaction_delta(previous_type, reaction.reaction_type),
+            now
         )
+        analytics_cache.pop(reaction.article_id, None)
         
         return {
             "success": True,
             "likes": likes_count,
             "dislikes": dislikes_count
         }
-    except Exception as e:
+    except PyMongoError as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/articles/{article_id}/analytics")
-async def get_article_analytics(article_id: int):
+async def get_article_analytics(article_id: int, request: Request, response: Response):
     try:
-        db = get_db()
-        analytics_collection = db.article_analytics
+        analytics = analytics_cache.get(article_id)
+        if analytics is None:
+            analytics = await run_mongo(lambda: analytics_collection.find_one(
+                {"article_id": article_id},
+                ANALYTICS_PROJECTION
+            ))
+            if not analytics:
+                analytics = {
+                    "article_id": article_id,
+                    "total_views": 0,
+                    "total_likes": 0,
+                    "total_dislikes": 0
+                }
+            analytics_cache[article_id] = analytics
+        
+        etag = make_etag(
+            article_id,
+            analytics.get("updated_at"),
+            analytics.get("total_views", 0),
+            analytics.get("total_likes", 0),
+            analytics.get("total_dislikes", 0)
+        )
+        not_modified = check_etag(request, response, etag, ANALYTICS_CACHE_CONTROL)
+        if not_modified:
+            return not_modified
         
-        analytics = analytics_collection.find_one({"article_id": article_id})
-        if analytics:
-            analytics["_id"] = str(analytics["_id"])
-            return analytics
-        else:
-            return {
-                "article_id": article_id,
-                "total_views": 0,
-                "total_likes": 0,
-                "total_dislikes": 0
-            }
-    except Exception as e:
+        return analytics
+    except PyMongoError as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/articles/{article_id}/user-reaction/{user_wallet}")
-async def get_user_reaction(article_id: int, user_wallet: str):
+async def get_user_reaction(article_id: int, user_wallet: str, request: Request, response: Response):
     try:
-        db = get_db()
-        reactions_collection = db.article_reactions
+        reaction = await run_mongo(lambda: reactions_collection.find_one(
+            {"article_id": article_id, "user_wallet": user_wallet},
+            {"_id": 0, "reaction_type": 1}
+        ))
+        user_reaction = {
+            "has_reacted": reaction is not None,
+            "reaction_type": reaction["reaction_type"] if reaction else None
+        }
         
-        reaction = reactions_collection.find_one({
-            "article_id": article_id,
-            "user_wallet": user_wallet
-        })
+        etag = make_etag(article_id, user_wallet, user_reaction["reaction_type"])
+        not_modified = check_etag(request, response, etag, USER_REACTION_CACHE_CONTROL)
+        if not_modified:
+            return not_modified
         
-        if reaction:
-            return {
-                "has_reacted": True,
-                "reaction_type": reaction["reaction_type"]
-            }
-        else:
-            return {
-                "has_reacted": False,
-                "reaction_type": None
-            }
-    except Exception as e:
+        return user_reaction
+    except PyMongoError as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/api/articles/{article_id}/react/{user_wallet}")
 async def remove_reaction(article_id: int, user_wallet: str):
     try:
-        db = get_db()
-        reactions_collection = db.article_reactions
-        analytics_collection = db.article_analytics
-        
         # Remove the reaction
-        reactions_collection.delete_one({
+        removed = await run_mongo(lambda: reactions_collection.find_one_and_delete({
             "article_id": article_id,
             "user_wallet": user_wallet
-        })
-        
-        # Recalculate counts
-        likes_count = reactions_collection.count_documents({
-            "article_id": article_id,
-            "reaction_type": "like"
-        })
-        
-        dislikes_count = reactions_collection.count_documents({
-            "article_id": article_id,
-            "reaction_type": "dislike"
-        })
-        
-        # Update analytics
-        analytics_collection.update_one(
-            {"article_id": article_id},
-            {
-                "$set": {
-                    "total_likes": likes_count,
-                    "total_dislikes": dislikes_count,
-                    "updated_at": datetime.utcnow()
-                }
-            },
-            upsert=True
+        }))
+        removed_type = removed["reaction_type"] if removed else None
+        
+        # Update analytics by the removed reaction instead of recounting
+        likes_count, dislikes_count = await apply_reaction_delta(
+            article_id,
+            reaction_delta(removed_type, None),
+            datetime.utcnow()
         )
+        analytics_cache.pop(article_id, None)
         
         return {
             "success": True,
             "likes": likes_count,
             "dislikes": dislikes_count
         }
-    except Exception as e:
+    except PyMongoError as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/users/favorites")
+# Favorite writes return 204 No Content; the listing endpoint is the source of truth
+@app.post("/api/users/favorites", status_code=204, response_class=Response)
 async def add_to_favorites(favorite: FavoriteArticle):
     try:
-        db = get_db()
-        favorites_collection = db.user_favorites
+        favorite_data = favorite.model_dump()
+        favorite_data["added_at"] = datetime.utcnow()
         
-        favorite_data = {
-            "user_wallet": favorite.user_wallet,
-            "article_id": favorite.article_id,
-            "article_title": favorite.article_title,
-            "added_at": datetime.utcnow()
-        }
+        # Re-adding an existing favorite leaves it untouched
+        await run_mongo(lambda: favorites_collection.update_one(
+            {"user_wallet": favorite.user_wallet, "article_id": favorite.article_id},
+            {"$setOnInsert": favorite_data},
+            upsert=True
+        ))
         
-        try:
-            favorites_collection.insert_one(favorite_data)
-            return {"success": True}
-        except DuplicateKeyError:
-            return {"success": True, "message": "Already in favorites"}
-    except Exception as e:
+        return Response(status_code=204)
+    except PyMongoError as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.delete("/api/users/favorites/{user_wallet}/{article_id}")
+@app.delete("/api/users/favorites/{user_wallet}/{article_id}", status_code=204, response_class=Response)
 async def remove_from_favorites(user_wallet: str, article_id: int):
     try:
-        db = get_db()
-        favorites_collection = db.user_favorites
-        
-        favorites_collection.delete_one({
+        await run_mongo(lambda: favorites_collection.delete_one({
             "user_wallet": user_wallet,
             "article_id": article_id
-        })
+        }))
         
-        return {"success": True}
-    except Exception as e:
+        return Response(status_code=204)
+    except PyMongoError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Point lookup for a single favorite, so checking one article doesn't page through the whole list
+@app.get("/api/users/{user_wallet}/favorites/{article_id}")
+async def is_article_favorited(user_wallet: str, article_id: int):
+    try:
+        favorite = await run_mongo(lambda: favorites_collection.find_one(
+            {"user_wallet": user_wallet, "article_id": article_id},
+            {"_id": 1}
+        ))
+        return {"is_favorited": favorite is not None}
+    except PyMongoError as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Keyset pagination for per-user listings sorted newest first, with _id breaking ties between
+# items that share a timestamp. The cursor is "<sort field ISO time>_<_id>" of the last item on
+# the previous page, so later pages never pay for skip() and never skip tied items.
+def page_sort(sort_field: str):
+    return [(sort_field, -1), ("_id", -1)]
+
+def page_query(user_wallet: str, sort_field: str, cursor: Optional[str]):
+    query = {"user_wallet": user_wallet}
+    if cursor:
+        try:
+            timestamp, last_id = cursor.rsplit("_", 1)
+            timestamp, last_id = datetime.fromisoformat(timestamp), ObjectId(last_id)
+        except (ValueError, InvalidId):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query["$or"] = [
+            {sort_field: {"$lt": timestamp}},
+            {sort_field: timestamp, "_id": {"$lt": last_id}}
+        ]
+    return query
+
+# Returned directly so the documents skip jsonable_encoder's per-item walk; a full page
+# advertises the cursor for the next one in the X-Next-Cursor header. _id is only needed
+# for the cursor, so it is dropped from the body.
+def page_response(items: list, sort_field: str, limit: int):
+    headers = {}
+    if len(items) == limit and isinstance(items[-1].get(sort_field), datetime):
+        headers["X-Next-Cursor"] = f"{items[-1][sort_field].isoformat()}_{items[-1]['_id']}"
+    for item in items:
+        item.pop("_id", None)
+    return ORJSONResponse(items, headers=headers)
+
 @app.get("/api/users/{user_wallet}/favorites")
-async def get_user_favorites(user_wallet: str):
+async def get_user_favorites(
+    user_wallet: str,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None
+):
     try:
-        db = get_db()
-        favorites_collection = db.user_favorites
+        query = page_query(user_wallet, "added_at", cursor)
+        favorites = await run_mongo(lambda: favorites_collection.find(
+            query
+        ).sort(page_sort("added_at")).limit(limit).to_list(None))
         
-        favorites = list(favorites_collection.find(
-            {"user_wallet": user_wallet}
-        ).sort("added_at", -1))
-        
-        for fav in favorites:
-            fav["_id"] = str(fav["_id"])
-        
-        return favorites
-    except Exception as e:
+        return page_response(favorites, "added_at", limit)
+    except PyMongoError as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/users/{user_wallet}/articles")
-async def get_user_articles(user_wallet: str):
+async def get_user_articles(
+    user_wallet: str,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None
+):
     try:
-        db = get_db()
-        articles_collection = db.user_articles
-        
-        articles = list(articles_collection.find(
-            {"user_wallet": user_wallet}
-        ).sort("created_at", -1))
+        query = page_query(user_wallet, "created_at", cursor)
+        articles = await run_mongo(lambda: articles_collection.find(
+            query
+        ).sort(page_sort("created_at")).limit(limit).to_list(None))
         
-        for article in articles:
-            article["_id"] = str(article["_id"])
-        
-        return articles
-    except Exception as e:
+        return page_response(articles, "created_at", limit)
+    except PyMongoError as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # Application startup event with MongoDB initialization
 @app.on_event("startup")
 async def startup_event():
+    global view_flush_task, view_flush_stop
     print("Starting WriteStream server...")
     print(f"PORT environment variable: {os.getenv('PORT', 'Not set')}")
     print(f"MONGODB_URL set: {bool(MONGODB_URL)}")
     print(f"PINATA_API_KEY set: {bool(PINATA_API_KEY)}")
     
+    if SERVE_UPLOADS:
+        app.state.pinata = create_pinata_client()
+    
     # Initialize MongoDB
-    mongodb_initialized = initialize_mongodb()
+    mongodb_initialized = await initialize_mongodb()
     
     if mongodb_initialized:
         try:
             print("Creating MongoDB indexes...")
             
-            # Create unique indexes
-            db.users.create_index("wallet_address", unique=True)
-            db.article_views.create_index([("article_id", 1), ("user_wallet", 1)], unique=True)
-            db.article_reactions.create_index([("article_id", 1), ("user_wallet", 1)], unique=True)
-            db.user_favorites.create_index([("user_wallet", 1), ("article_id", 1)], unique=True)
-            
-            # Create regular indexes
-            db.article_analytics.create_index("article_id", unique=True)
-            db.user_articles.create_index("user_wallet")
-            
-            # Create text index for search
-            db.user_favorites.create_index([("article_title", "text")])
+            # One createIndexes command per collection, all collections in parallel
+            await asyncio.gather(*(
+                db[collection].create_indexes(indexes)
+                for collection, indexes in MONGO_INDEXES.items()
+            ))
             
             print("MongoDB indexes created successfully!")
             
@@ -542,10 +737,36 @@ async def startup_event():
             print(f"Error creating indexes: {e}")
     else:
         print("Server started without MongoDB connection. Some features may not work.")
+    
+    view_flush_stop = asyncio.Event()
+    view_flush_task = asyncio.create_task(flush_views_periodically())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Stop the periodic flush; it finishes any in-flight write and flushes what is still buffered
+    if view_flush_task is not None:
+        view_flush_stop.set()
+        await view_flush_task
+    
+    if SERVE_UPLOADS:
+        await app.state.pinata.aclose()
 
 # Use Render's PORT environment variable
 if __name__ == "__main__":
     import uvicorn
     port = 8000  # Default port
-    print(f"Starting server on 0.0.0.0:{port}")
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # One async worker per core is enough to use every core; each worker runs its own startup
+    # hook and so holds its own Mongo pool (minPoolSize..maxPoolSize connections) and caches,
+    # which is why this is not gunicorn's 2*cpu+1 sync-worker default.
+    # uvloop and httptools come with uvicorn[standard].
+    workers = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+    print(f"Starting server on 0.0.0.0:{port} with {workers} workers")
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=port,
+        workers=workers,
+        loop="uvloop",
+        http="httptools",
+        proxy_headers=True
+    )
@@ -0,0 +1,115 @@
+from fastapi import APIRouter, FastAPI, UploadFile, File, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from fastapi.middleware.cors import CORSMiddleware
+import httpx
+import os
+import secrets
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PINATA_API_KEY = os.getenv("PINATA_API_KEY")
+PINATA_SECRET_API_KEY = os.getenv("PINATA_SECRET_API_KEY")
+PINATA_API_URL = "https://api.pinata.cloud"
+UPLOAD_CHUNK_SIZE = 64 * 1024
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 100 * 1024 * 1024))
+UPLOAD_TOO_LARGE = f"Upload exceeds the {MAX_UPLOAD_BYTES} byte limit"
+
+router = APIRouter()
+
+# Reject oversized uploads from Content-Length before Starlette reads and spools the body.
+# Registered before CORSMiddleware so the 413 still carries CORS headers.
+class UploadSizeLimitMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == "/upload/":
+            content_length = dict(scope["headers"]).get(b"content-length", b"")
+            if content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES:
+                response = JSONResponse(status_code=413, content={"detail": UPLOAD_TOO_LARGE})
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+# Shared HTTP client for Pinata with the API credentials set once
+def create_pinata_client():
+    pinata_headers = {
+        "pinata_api_key": PINATA_API_KEY,
+        "pinata_secret_api_key": PINATA_SECRET_API_KEY,
+    }
+    return httpx.AsyncClient(
+        base_url=PINATA_API_URL,
+        headers={key: value for key, value in pinata_headers.items() if value},
+        timeout=httpx.Timeout(60.0, connect=10.0),
+        limits=httpx.Limits(max_keepalive_connections=32),
+        http2=True
+    )
+
+# Build a streaming multipart body so uploads are forwarded chunk by chunk instead of buffered in memory
+def build_multipart_upload(file: UploadFile):
+    boundary = secrets.token_hex(16)
+    filename = (file.filename or "upload").replace("\\", "\\\\").replace('"', "%22")
+    content_type = file.content_type or "application/octet-stream"
+
+    head = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode()
+    tail = f"\r\n--{boundary}--\r\n".encode()
+
+    async def body():
+        yield head
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            yield chunk
+        yield tail
+
+    headers = {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+    if file.size is not None:
+        headers["Content-Length"] = str(len(head) + file.size + len(tail))
+    return body(), headers
+
+# Existing upload endpoint
+@router.post("/upload/")
+async def upload_file(request: Request, file: UploadFile = File(...)):
+    # Chunked requests carry no Content-Length, so check the spooled size as well
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=UPLOAD_TOO_LARGE)
+
+    body, headers = build_multipart_upload(file)
+
+    # Shared async client keeps the event loop free and reuses pooled TLS connections to Pinata
+    response = await request.app.state.pinata.post("/pinning/pinFileToIPFS", headers=headers, content=body)
+
+    # Pass Pinata's JSON body straight through rather than parsing and re-serializing it
+    return Response(
+        content=response.content,
+        status_code=response.status_code,
+        media_type=response.headers.get("content-type", "application/json")
+    )
+
+# Standalone upload service, so large uploads don't compete with the API workers:
+#   uvicorn upload_worker:app --host 0.0.0.0 --port 8001
+app = FastAPI()
+
+app.add_middleware(UploadSizeLimitMiddleware)
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+app.include_router(router)
+
+@app.on_event("startup")
+async def startup_event():
+    print("Starting WriteStream upload worker...")
+    print(f"PINATA_API_KEY set: {bool(PINATA_API_KEY)}")
+    app.state.pinata = create_pinata_client()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await app.state.pinata.aclose()